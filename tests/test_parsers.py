@@ -0,0 +1,38 @@
+from wggesuchtstats.parsers import ListPageParser
+
+LIST_ROW = (
+    '<tr class="offer_list_item">'
+    '<td class="ang_spalte_datum"><a href="{url}"><span>05.03.2024</span></a></td>'
+    '<td class="ang_spalte_miete"><b>500€</b></td>'
+    '<td class="ang_spalte_groesse"><span>12m²</span></td>'
+    '<td class="ang_spalte_stadt"><span>Berlin Mitte</span></td>'
+    '<td class="ang_spalte_icons"><img alt="weiblich"></td>'
+    "</tr>"
+)
+
+
+def list_page(page_num, linked_pages=()):
+    """A search results page with two ads and pagination links to linked_pages."""
+    rows = "".join(LIST_ROW.format(url=f"/ad-{page_num}-{i}.html") for i in range(2))
+    # The site's page URLs count from 0, the link texts from 1
+    links = "".join(
+        f'<li><a class="page-link" href="/wg-zimmer-in-Berlin.8.0.1.{n}.html">{n + 1}</a></li>'
+        for n in linked_pages
+    )
+    return f'<html><body><table>{rows}</table><ul class="pagination">{links}</ul></body></html>'
+
+
+def test_list_page_parses_ads():
+    ads = ListPageParser(list_page(0)).parse()
+
+    assert {ad.url for ad in ads} == {"/ad-0-0.html", "/ad-0-1.html"}
+
+
+def test_last_page_is_read_from_link_urls_not_link_texts():
+    parser = ListPageParser(list_page(0, linked_pages=[1, 2, 14]))
+
+    assert parser.last_page() == 14
+
+
+def test_last_page_without_pagination_links():
+    assert ListPageParser(list_page(0)).last_page() is None
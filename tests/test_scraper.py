@@ -0,0 +1,129 @@
+import os
+import re
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+from wggesuchtstats import scraper
+from wggesuchtstats.models import FlatAdDetails
+
+from test_parsers import list_page
+
+EMPTY_PAGE = "<html><body></body></html>"
+DETAIL_PAGE = (
+    '<html><body><h1 class="detailed-view-title"><span class="headline">Helles Zimmer</span></h1>'
+    "</body></html>"
+)
+
+
+def stub_requests_get(monkeypatch, pages):
+    """Serves pages by URL, an empty page for unknown URLs, and records the requested URLs."""
+    requested = []
+
+    def requests_get(url):
+        requested.append(url)
+        return SimpleNamespace(status_code=200, text=pages.get(url, EMPTY_PAGE), raise_for_status=lambda: None)
+
+    monkeypatch.setattr(scraper, "requests_get", requests_get)
+    return requested
+
+
+def list_page_url(page_num):
+    return f"{scraper.config.WG_GESUCHT_BASE_URL}/{scraper.config.CITY_PART}.{page_num}.html?pagination=1&pu="
+
+
+def requested_pages(requested):
+    return sorted(int(re.search(r"\.(\d+)\.html", url).group(1)) for url in requested)
+
+
+@pytest.mark.parametrize(
+    "linked_pages, expected_pages",
+    [
+        # Pagination on the first page links to the last one
+        ({0: [1, 2, 3, 4]}, [0, 1, 2, 3, 4, 5]),
+        # Pagination only links to nearby pages
+        ({0: [1, 2], 2: [3, 4]}, [0, 1, 2, 3, 4, 5]),
+        # No pagination at all
+        ({}, [0, 1, 2, 3, 4, 5]),
+    ],
+)
+def test_find_shared_flats_scrapes_until_empty_page(monkeypatch, linked_pages, expected_pages):
+    pages = {list_page_url(n): list_page(n, linked_pages.get(n, ())) for n in range(5)}
+    requested = stub_requests_get(monkeypatch, pages)
+
+    ads = scraper.find_shared_flats()
+
+    assert len(ads) == 10
+    assert requested_pages(requested) == expected_pages
+
+
+def test_find_shared_flats_stops_at_end_page(monkeypatch):
+    pages = {list_page_url(n): list_page(n, range(1, 5)) for n in range(5)}
+    requested = stub_requests_get(monkeypatch, pages)
+
+    ads = scraper.find_shared_flats(2, 4)
+
+    assert {ad.url for ad in ads} == {"/ad-2-0.html", "/ad-2-1.html", "/ad-3-0.html", "/ad-3-1.html"}
+    assert requested_pages(requested) == [2, 3]
+
+
+@pytest.fixture
+def details_cache(monkeypatch, tmp_path):
+    """Points the details cache to a fresh file and returns a function simulating a new run."""
+    monkeypatch.setattr(scraper, "DETAILS_CACHE_FILE", str(tmp_path / "cache" / "details"))
+
+    def new_run():
+        if scraper._details_cache is not None:
+            scraper._details_cache.close()
+        monkeypatch.setattr(scraper, "_details_memo", OrderedDict())
+        monkeypatch.setattr(scraper, "_details_cache", None)
+        monkeypatch.setattr(scraper, "_details_cache_opened", False)
+
+    new_run()
+    yield new_run
+    new_run()
+
+
+def test_flat_details_are_cached_across_runs(monkeypatch, details_cache):
+    requested = stub_requests_get(monkeypatch, {"/ad.html": DETAIL_PAGE})
+
+    details = scraper.get_flat_details("/ad.html")
+    assert scraper.get_flat_details("/ad.html") == details
+    details_cache()
+    assert scraper.get_flat_details("/ad.html") == details
+
+    assert details.headline == "Helles Zimmer"
+    assert requested == ["/ad.html"]
+
+
+def test_expired_flat_details_are_fetched_again(monkeypatch, details_cache):
+    requested = stub_requests_get(monkeypatch, {"/ad.html": DETAIL_PAGE})
+    monkeypatch.setattr(scraper, "DETAILS_CACHE_TTL", -1)
+
+    scraper.get_flat_details("/ad.html")
+    details_cache()
+    scraper.get_flat_details("/ad.html")
+
+    assert requested == ["/ad.html", "/ad.html"]
+
+
+def test_empty_flat_details_are_not_cached(monkeypatch, details_cache):
+    requested = stub_requests_get(monkeypatch, {})
+
+    assert scraper.get_flat_details("/offline.html") == FlatAdDetails()
+    assert scraper.get_flat_details("/offline.html") == FlatAdDetails()
+
+    assert requested == ["/offline.html", "/offline.html"]
+
+
+def test_details_cache_file_none_disables_disk_cache(monkeypatch, details_cache, tmp_path):
+    monkeypatch.setattr(scraper, "DETAILS_CACHE_FILE", None)
+    requested = stub_requests_get(monkeypatch, {"/ad.html": DETAIL_PAGE})
+
+    scraper.get_flat_details("/ad.html")
+    details_cache()
+    scraper.get_flat_details("/ad.html")
+
+    assert requested == ["/ad.html", "/ad.html"]
+    assert not os.path.exists(tmp_path / "cache")
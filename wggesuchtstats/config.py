@@ -2,22 +2,27 @@
 WG_GESUCHT_BASE_URL = "https://www.wg-gesucht.de"
 CITY_PART = "wg-zimmer-in-Berlin.8.0.0"
 
-# --- CSS Selectors for the Ad List Page ---
-LIST_PAGE_SELECTORS = {
-    "ad_row": "tr.offer_list_item",
-    "date": "td.ang_spalte_datum span",
-    "url": "td.ang_spalte_datum a",
-    "rent": "td.ang_spalte_miete b",
-    "size": "td.ang_spalte_groesse span",
-    "district": "td.ang_spalte_stadt span",
-    "inhabitants_icon": 'td.ang_spalte_icons img[alt*="{pattern}"]',
+# --- XPath Expressions for the Ad List Page ---
+LIST_PAGE_XPATHS = {
+    "ad_row": "//tr[contains(concat(' ', normalize-space(@class), ' '), ' offer_list_item ')]",
+    "date": "string(.//td[contains(concat(' ', normalize-space(@class), ' '), ' ang_spalte_datum ')]//span)",
+    "url": "string((.//td[contains(concat(' ', normalize-space(@class), ' '), ' ang_spalte_datum ')]//a)[1]/@href)",
+    "rent": "string(.//td[contains(concat(' ', normalize-space(@class), ' '), ' ang_spalte_miete ')]//b)",
+    "size": "string(.//td[contains(concat(' ', normalize-space(@class), ' '), ' ang_spalte_groesse ')]//span)",
+    "district": "string(.//td[contains(concat(' ', normalize-space(@class), ' '), ' ang_spalte_stadt ')]//span)",
+    "inhabitants_icon_alts": ".//td[contains(concat(' ', normalize-space(@class), ' '), ' ang_spalte_icons ')]//img/@alt",
+    "page_link": "//ul[contains(concat(' ', normalize-space(@class), ' '), ' pagination ')]//a/@href",
 }
 
-# --- CSS Selectors for the Ad Detail Page ---
-DETAIL_PAGE_SELECTORS = {
-    "headline": ".detailed-view-title span[class]",
-    "description": "div[id^='freitext']",
-    "address_link": 'a[href="#map_container"]',
+# --- XPath Expressions for the Ad Detail Page ---
+DETAIL_PAGE_XPATHS = {
+    "headline": "//*[contains(concat(' ', normalize-space(@class), ' '), ' detailed-view-title ')]//span[@class]",
+    "description": "//div[starts-with(@id, 'freitext')]",
+    "address_link": "(//a[@href='#map_container'])[1]",
+    # Both labels in one lookup, the value is read relative to each label span
+    "availability_label": "//span[not(*) and (contains(., 'frei ab:') or contains(., 'frei bis:'))]",
+    "availability_value": "string((ancestor::div[1]/following-sibling::div[1]//span)[1])",
+    "age": "string(//span[not(*) and starts-with(., 'Bewohneralter:')])",
 }
 
 USER_AGENTS = [
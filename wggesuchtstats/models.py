@@ -1,10 +1,20 @@
 import csv
 import datetime
+import gc
+import operator
 from dataclasses import dataclass, fields
-from typing import Iterable, Optional, Union
+from itertools import chain
+from typing import Iterable, Optional, Sequence, Union
 
+try:
+    import polars as pl
+except ImportError:  # Optional, installed with the fast-csv extra; to_csv falls back to the csv module
+    pl = None
 
-@dataclass(frozen=True)
+_CSV_BUFFER_SIZE = 1 << 20
+
+
+@dataclass(frozen=True, slots=True)
 class FlatAd:
     url: str
     published: datetime
@@ -25,7 +35,7 @@ class FlatAd:
         return hash(self.url)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FlatAdDetails:
     """
     Detailed information about a flat ad scraped from the detail page.
@@ -48,28 +58,54 @@ def to_csv(objects: Iterable[Union[FlatAd, FlatAdDetails]], output_path: str) ->
         objects: List of FlatAd or FlatAdDetails objects to export
         output_path: Path where the CSV file should be saved
     """
-    if not objects:
+    objects = iter(objects)
+    first_object = next(objects, None)
+    if first_object is None:
         return
     
     # Get the first object to determine the dataclass type and field names
-    first_object = next(iter(objects))
-    fieldnames = [field.name for field in fields(first_object)]
+    fieldnames = tuple(field.name for field in fields(first_object))
+    get_values = operator.attrgetter(*fieldnames)
+    objects = chain((first_object,), objects)
+
+    if pl is not None:
+        _write_csv_polars(fieldnames, [get_values(obj) for obj in objects], output_path)
+        return
+
+    rows = (_format_row(get_values(obj)) for obj in objects)
     
-    with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for obj in objects:
-            row_data = {}
-            for field in fields(obj):
-                value = getattr(obj, field.name)
-                # Handle different data types for CSV output
-                if value is None:
-                    row_data[field.name] = ''
-                elif isinstance(value, datetime.datetime):
-                    row_data[field.name] = value.isoformat()
-                elif isinstance(value, datetime.date):
-                    row_data[field.name] = value.isoformat()
-                else:
-                    row_data[field.name] = value
-            writer.writerow(row_data)
\ No newline at end of file
+    gc_was_enabled = gc.isenabled()
+    # Rows are short-lived tuples, cyclic GC passes over them are wasted work
+    gc.disable()
+    try:
+        with open(output_path, 'w', newline='', encoding='utf-8', buffering=_CSV_BUFFER_SIZE) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
+            writer.writerows(rows)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _write_csv_polars(fieldnames: Sequence[str], rows: list, output_path: str) -> None:
+    """Writes the rows with polars, formatted like the csv module fallback."""
+    columns = {}
+    for name, values in zip(fieldnames, zip(*rows)):
+        # Dates are formatted with isoformat() like the fallback, polars' own
+        # formats cannot omit zero microseconds the way isoformat() does
+        if any(isinstance(value, datetime.date) for value in values):
+            values = [None if value is None else value.isoformat() for value in values]
+        columns[name] = values
+    frame = pl.DataFrame(columns)
+    # The csv module writes empty strings unquoted, polars would write ""
+    frame = frame.with_columns(pl.col(pl.String).replace("", None))
+    frame.write_csv(output_path, line_terminator="\r\n")
+
+
+def _format_row(values: tuple) -> list:
+    """Converts field values to their CSV representation."""
+    # datetime.datetime is a subclass of datetime.date, both export as ISO 8601
+    return [
+        '' if value is None else value.isoformat() if isinstance(value, datetime.date) else value
+        for value in values
+    ]
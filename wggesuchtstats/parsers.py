@@ -1,9 +1,17 @@
 import logging
 import re
+import sys
 from datetime import datetime, date
-from typing import Set, Optional, Tuple
+from typing import Container, Set, Optional, Tuple
 
-from bs4 import BeautifulSoup, Tag
+import lxml.html
+from lxml import etree
+from lxml.html import HtmlElement
+
+try:
+    import re2 as _regex
+except ImportError:  # Optional, installed with the re2 extra
+    _regex = re
 
 from wggesuchtstats import config
 from wggesuchtstats.models import FlatAd, FlatAdDetails
@@ -11,47 +19,78 @@ from wggesuchtstats.models import FlatAd, FlatAdDetails
 log = logging.getLogger(__name__)
 
 
-def _extract_street_from_address(address: Optional[str]) -> Optional[str]:
-    """Extract street name from a full address string."""
-    if not address:
-        return None
-    address = re.sub(r"\s+", " ", address.strip())
-    # Pattern to match street + optional house number before a 5-digit postal code
-    pattern = r"^(.+?)(?=1[0-4]\d{3}\s|$)"
-    match = re.match(pattern, address)
-    if match:
-        street = match.group(1).strip().rstrip(".,")
-        return street if street else None
-    return None
-
-
-def _extract_zip_from_address(address: Optional[str]) -> Optional[str]:
-    """Extract zip code from a full address string."""
+# A Berlin postal code (10xxx to 14xxx) that is not part of a longer number. Written
+# without lookarounds and \d, so RE2 and re match it the same way, in linear time
+_ZIP_RE = _regex.compile(r"(?:^|[^0-9])(1[0-4][0-9]{3})(?:[^0-9]|$)")
+_PAGE_HREF_RE = re.compile(r"\.(\d+)\.html")
+_DATE_RE = re.compile(r"\d{2}\.\d{2}\.\d{4}")
+_AGE_RANGE_RE = re.compile(r"(\d+)\s*bis\s*(\d+)")
+_AGE_RE = re.compile(r"(\d+)")
+
+
+def _parse_de_date(text: str) -> datetime:
+    """Parse a dd.mm.yyyy date, slicing the common zero-padded form instead of using strptime."""
+    if not _DATE_RE.fullmatch(text):
+        return datetime.strptime(text, "%d.%m.%Y")
+    return datetime(int(text[6:10]), int(text[3:5]), int(text[0:2]))
+
+
+def _split_address(address: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Extract street name and zip code from a whitespace-normalized address string."""
     if not address:
+        return None, None
+    address = address.strip()
+    # Street + optional house number is everything before the postal code
+    match = _ZIP_RE.search(address)
+    if match is None:
+        return address.rstrip(" ,.") or None, None
+    return address[:match.start(1)].rstrip(" ,.") or None, match.group(1)
+
+
+def _parse_document(html: str) -> Optional[HtmlElement]:
+    """Parse a page into an lxml tree, or None if the page is empty."""
+    try:
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # lxml refuses str input with an XML encoding declaration, parse the UTF-8 bytes instead
+            parser = lxml.html.HTMLParser(encoding="utf-8")
+            return lxml.html.document_fromstring(html.encode("utf-8"), parser=parser)
+    except etree.ParserError:
+        # Empty page, there is nothing to parse
         return None
-    address = re.sub(r"\s+", " ", address.strip())
-    # Pattern to match Berlin postal codes (10xxx to 14xxx)
-    pattern = r"(1[0-4]\d{3})"
-    match = re.search(pattern, address)
-    return match.group(1) if match else None
 
 
 # --- Parser for the Search Results (List) Page ---
 
+# Compiled once per process; plain strings instead of smart strings tied to the tree
+_LIST_PAGE_XPATHS = {
+    key: etree.XPath(xpath, smart_strings=False)
+    for key, xpath in config.LIST_PAGE_XPATHS.items()
+}
+
 
 class ListPageParser:
     """Parses the list of ads on a search results page."""
 
     def __init__(self, html: str):
-        self.soup = BeautifulSoup(html, features="html.parser")
-        self.selectors = config.LIST_PAGE_SELECTORS
+        self.tree = _parse_document(html)
+        self.xpaths = _LIST_PAGE_XPATHS
+        self.skipped = 0
+
+    def parse(self, skip_urls: Container[str] = frozenset()) -> Set[FlatAd]:
+        """
+        Parses all ad rows from the page's HTML.
 
-    def parse(self) -> Set[FlatAd]:
-        """Parses all ad rows from the page's HTML."""
+        Rows whose URL is in skip_urls are not parsed any further and only
+        counted in self.skipped.
+        """
         ads = set()
-        for row in self.soup.select(self.selectors["ad_row"]):
+        if self.tree is None:
+            return ads
+        for row in self.xpaths["ad_row"](self.tree):
             try:
-                ad = self._parse_single_ad(row)
+                ad = self._parse_single_ad(row, skip_urls)
                 if ad:
                     ads.add(ad)
             except Exception as e:
@@ -59,57 +98,92 @@ class ListPageParser:
                 continue
         return ads
 
-    def _parse_single_ad(self, row: Tag) -> Optional[FlatAd]:
-        """Parses a single ad from a BeautifulSoup table row element."""
+    def last_page(self) -> Optional[int]:
+        """
+        Returns the highest page number linked from the pagination, or None
+        without pagination links.
+
+        The number is read from the link's URL, which counts pages from 0 like
+        the scraper does, not from the link text, which counts from 1.
+        """
+        if self.tree is None:
+            return None
+        page_numbers = []
+        for href in self.xpaths["page_link"](self.tree):
+            match = _PAGE_HREF_RE.search(href)
+            if match:
+                page_numbers.append(int(match.group(1)))
+        return max(page_numbers, default=None)
+
+    def _parse_single_ad(
+        self, row: HtmlElement, skip_urls: Container[str]
+    ) -> Optional[FlatAd]:
+        """Parses a single ad from an lxml table row element."""
+        url = self._extract_url(row)
+        if url in skip_urls:
+            self.skipped += 1
+            return None
+        female, male, diverse, total = self._count_inhabitants(row)
         return FlatAd(
-            url=self._extract_url(row),
+            url=url,
             published=self._extract_date(row),
             rent=self._extract_rent(row),
             size=self._extract_size(row),
             district=self._extract_district(row),
-            female_inhabitants=self._count_inhabitants(row, "weiblich"),
-            male_inhabitants=self._count_inhabitants(
-                row, "männlich"
-            ),  # Corrected from "Mal"
-            diverse_inhabitants=self._count_inhabitants(row, "divers"),
-            total_inhabitants=self._count_inhabitants(row, ""),
+            female_inhabitants=female,
+            male_inhabitants=male,
+            diverse_inhabitants=diverse,
+            total_inhabitants=total,
         )
 
-    def _extract_text(self, row: Tag, selector: str) -> str:
-        element = row.select_one(selector)
-        return element.get_text(strip=True) if element else ""
+    def _extract_text(self, row: HtmlElement, key: str) -> str:
+        return self.xpaths[key](row).strip()
 
-    def _extract_number(self, row: Tag, selector: str, suffix: str) -> int:
-        text = self._extract_text(row, selector)
+    def _extract_number(self, row: HtmlElement, key: str, suffix: str) -> int:
+        text = self._extract_text(row, key)
         return int(text.rstrip(suffix)) if text else 0
 
-    def _extract_date(self, row: Tag) -> datetime:
-        date_text = self._extract_text(row, self.selectors["date"])
-        return datetime.strptime(date_text, "%d.%m.%Y")
+    def _extract_date(self, row: HtmlElement) -> datetime:
+        date_text = self._extract_text(row, "date")
+        return _parse_de_date(date_text)
 
-    def _extract_url(self, row: Tag) -> str:
-        a = row.select_one(self.selectors["url"])
-        return a["href"].strip() if a and a.has_attr("href") else ""
+    def _extract_url(self, row: HtmlElement) -> str:
+        return self._extract_text(row, "url")
 
-    def _extract_rent(self, row: Tag) -> int:
-        return self._extract_number(row, self.selectors["rent"], "€")
+    def _extract_rent(self, row: HtmlElement) -> int:
+        return self._extract_number(row, "rent", "€")
 
-    def _extract_size(self, row: Tag) -> int:
-        return self._extract_number(row, self.selectors["size"], "m²")
+    def _extract_size(self, row: HtmlElement) -> int:
+        return self._extract_number(row, "size", "m²")
 
-    def _extract_district(self, row: Tag) -> str:
-        district = self._extract_text(row, self.selectors["district"])
-        district = district.replace("Berlin", "").strip()
-        district = re.sub(r"\s+", " ", district)
-        return district if district else "Berlin"
+    def _extract_district(self, row: HtmlElement) -> str:
+        district = self._extract_text(row, "district")
+        district = " ".join(district.replace("Berlin", "").split())
+        # A few dozen district names repeat across thousands of ads, share one copy each
+        return sys.intern(district) if district else "Berlin"
 
-    def _count_inhabitants(self, row: Tag, alt_pattern: str) -> int:
-        selector = self.selectors["inhabitants_icon"].format(pattern=alt_pattern)
-        return len(row.select(selector))
+    def _count_inhabitants(self, row: HtmlElement) -> Tuple[int, int, int, int]:
+        """Counts female, male, diverse and total inhabitant icons in one pass."""
+        female = male = diverse = total = 0
+        for alt in self.xpaths["inhabitants_icon_alts"](row):
+            female += "weiblich" in alt
+            male += "männlich" in alt
+            diverse += "divers" in alt
+            total += 1
+        return female, male, diverse, total
 
 
 # --- Parser for the Ad Detail Page ---
 
+_DETAIL_PAGE_XPATHS = {
+    key: etree.XPath(xpath, smart_strings=False)
+    for key, xpath in config.DETAIL_PAGE_XPATHS.items()
+}
+# Full text of an element as a plain string, unlike text_content() no smart string tied to the tree
+_TEXT_XPATH = etree.XPath("string()", smart_strings=False)
+_AVAILABLE_FROM_LABEL = "frei ab:"
+_AVAILABLE_UNTIL_LABEL = "frei bis:"
+
 
 class DetailPageParser:
     """Parses the detail page of a single flat ad."""
@@ -120,65 +194,66 @@ class DetailPageParser:
         pass
 
     def __init__(self, html: str):
-        self.soup = BeautifulSoup(html, features="html.parser")
-        self.selectors = config.DETAIL_PAGE_SELECTORS
+        self.tree = _parse_document(html)
+        self.xpaths = _DETAIL_PAGE_XPATHS
 
     def parse(self) -> FlatAdDetails:
         """Parses the full ad details from the page's HTML."""
-        headline_tags = self.soup.select(self.selectors["headline"])
+        headline_tags = self.xpaths["headline"](self.tree) if self.tree is not None else []
         if not headline_tags:
             # Ad is no longer online, return empty details object
             return FlatAdDetails()
-        headline = headline_tags[0].text.strip()
-        if len(headline_tags) > 1:
-            headline = headline_tags[1].text.strip()
+        headline_tag = headline_tags[1] if len(headline_tags) > 1 else headline_tags[0]
+        headline = _TEXT_XPATH(headline_tag).strip()
 
         description = self._extract_description()
         address = self._extract_address()
+        street, zip_code = _split_address(address)
+        available_from, available_until = self._extract_availability_dates()
         age_min, age_max = self._extract_age_range()
 
         return FlatAdDetails(
             headline=headline,
             description=description,
-            street=_extract_street_from_address(address),
-            zip_code=_extract_zip_from_address(address),
-            available_from=self._extract_availability_date("frei ab:"),
-            available_until=self._extract_availability_date("frei bis:"),
+            street=street,
+            zip_code=zip_code,
+            available_from=available_from,
+            available_until=available_until,
             age_min=age_min,
             age_max=age_max,
         )
 
     def _extract_description(self) -> str:
-        description_divs = self.soup.select(self.selectors["description"])
-        return "\n".join([div.text.strip() for div in description_divs])
+        description_divs = self.xpaths["description"](self.tree)
+        return "\n".join([_TEXT_XPATH(div).strip() for div in description_divs])
 
     def _extract_address(self) -> Optional[str]:
-        address_link = self.soup.select_one(self.selectors["address_link"])
-        if address_link:
-            address_text = address_link.get_text(strip=True)
-            return re.sub(r"\s+", " ", address_text)
+        address_links = self.xpaths["address_link"](self.tree)
+        if address_links:
+            address_text = _TEXT_XPATH(address_links[0])
+            return " ".join(address_text.split())
         return None
 
-    def _extract_availability_date(self, label: str) -> Optional[date]:
-        label_span = self.soup.find("span", string=lambda t: t and label in t)
-        if label_span and label_span.find_parent("div"):
-            sibling_div = label_span.find_parent("div").find_next_sibling("div")
-            if sibling_div and sibling_div.find("span"):
-                date_text = sibling_div.find("span").get_text(strip=True)
-                if re.match(r"\d{2}\.\d{2}\.\d{4}", date_text):
-                    return datetime.strptime(date_text, "%d.%m.%Y").date()
-        return None
+    def _extract_availability_dates(self) -> Tuple[Optional[date], Optional[date]]:
+        """Reads the dates next to the first "frei ab:" and "frei bis:" labels."""
+        dates = {}
+        for label_span in self.xpaths["availability_label"](self.tree):
+            # The string value the XPath matched on, .text stops at a comment inside the span
+            label_text = _TEXT_XPATH(label_span)
+            label = _AVAILABLE_FROM_LABEL if _AVAILABLE_FROM_LABEL in label_text else _AVAILABLE_UNTIL_LABEL
+            if label in dates:
+                continue
+            date_text = self.xpaths["availability_value"](label_span).strip()
+            dates[label] = _parse_de_date(date_text).date() if _DATE_RE.match(date_text) else None
+        return dates.get(_AVAILABLE_FROM_LABEL), dates.get(_AVAILABLE_UNTIL_LABEL)
 
     def _extract_age_range(self) -> Tuple[Optional[int], Optional[int]]:
-        age_span = self.soup.find(
-            "span", string=lambda t: t and t.startswith("Bewohneralter:")
-        )
-        if age_span:
-            age_text = age_span.get_text()
-            match = re.search(r"(\d+)\s*bis\s*(\d+)", age_text)
+        age_text = self.xpaths["age"](self.tree)
+        if age_text:
+            match = _AGE_RANGE_RE.search(age_text)
             if match:
                 return int(match.group(1)), int(match.group(2))
-            match = re.search(r"(\d+)", age_text)
+            match = _AGE_RE.search(age_text)
             if match:
                 age = int(match.group(1))
                 return age, age
@@ -1,5 +1,13 @@
+import atexit
 import logging
-from typing import Set, Optional
+import os
+import shelve
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Container, Dict, Iterable, Iterator, Set, Optional, Tuple
 
 import backoff
 from wggesuchtstats import config
@@ -10,54 +18,181 @@ from wggesuchtstats.util import requests_get
 log = logging.getLogger(__name__)
 PageRenderError = DetailPageParser.PageRenderError
 
+# Set DETAILS_CACHE_FILE to None to fetch every ad again instead of using the on-disk cache
+DETAILS_CACHE_FILE: Optional[str] = "out/flat_details_cache"
+DETAILS_CACHE_TTL = 24 * 60 * 60  # seconds until cached details are fetched again
+DETAILS_MEMO_SIZE = 20000
+_details_cache_lock = threading.Lock()
+# URL -> (fetch time, details)
+_details_memo: "OrderedDict[str, Tuple[float, FlatAdDetails]]" = OrderedDict()
+_details_cache: Optional[shelve.Shelf] = None
+_details_cache_opened = False
+
 def find_shared_flats(
-    start_page: int = 0, end_page: Optional[int] = None
+    start_page: int = 0, end_page: Optional[int] = None, max_workers: int = 8
 ) -> Set[FlatAd]:
     """
     Scrape flat ads from WG-Gesucht with page range.
+
+    Pages are consumed in order until the first empty or failing page or
+    end_page. Pages linked from the pagination of the pages read so far are
+    fetched ahead concurrently; without pagination links, pages are fetched
+    one after another.
     """
-    all_ads = set()
+    # Keyed by URL, the identity of an ad, so workers can skip rows seen on earlier pages
+    all_ads: Dict[str, FlatAd] = {}
     page_num = start_page
+    futures: Dict[int, Future] = {}
 
-    while True:
-        if end_page is not None and page_num >= end_page:
-            log.info(f"Reached end page limit ({end_page}), stopping.")
-            break
-
-        url = f"{config.WG_GESUCHT_BASE_URL}/{config.CITY_PART}.{page_num}.html?pagination=1&pu="
-        log.debug(f"Scraping URL: {url}")
-        
-        try:
-            response = requests_get(url)
-            if response.status_code != 200:
-                log.warning(f"Page {page_num} returned status {response.status_code}, stopping.")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        next_page = start_page
+        last_known_page = start_page
+        while True:
+            if end_page is not None and page_num >= end_page:
+                log.info(f"Reached end page limit ({end_page}), stopping.")
                 break
 
-            page_ads = ListPageParser(response.text).parse()
-            if not page_ads:
+            fetch_until = last_known_page + 1 if end_page is None else min(last_known_page + 1, end_page)
+            for n in range(next_page, fetch_until):
+                futures[n] = executor.submit(_scrape_list_page, n, all_ads)
+            next_page = max(next_page, fetch_until)
+
+            try:
+                status_code, page_ads, skipped, last_page = futures.pop(page_num).result()
+            except Exception as e:
+                log.error(f"Error scraping page {page_num}: {e}")
+                break
+            if status_code != 200:
+                log.warning(f"Page {page_num} returned status {status_code}, stopping.")
+                break
+            if not page_ads and not skipped:
                 log.info(f"No more ads found on page {page_num}, stopping.")
                 break
 
-            all_ads.update(page_ads)
-            log.debug(f"Scraped {len(page_ads)} ads from page {page_num}")
+            for ad in page_ads:
+                all_ads.setdefault(ad.url, ad)
+            log.debug(f"Scraped {len(page_ads)} new ads from page {page_num}")
             page_num += 1
+            # The next page is tried even past the last linked one, like a plain page-by-page scrape
+            last_known_page = max(last_known_page, page_num, last_page or 0)
 
-        except Exception as e:
-            log.error(f"Error scraping page {page_num}: {e}")
-            break
+        # Pages past the stopping point are not needed anymore
+        for future in futures.values():
+            future.cancel()
 
     pages_scraped = max(0, page_num - start_page)
     log.info(f"Total ads scraped: {len(all_ads)} from {pages_scraped} pages.")
-    return all_ads
+    return set(all_ads.values())
+
+
+def _scrape_list_page(
+    page_num: int, seen_urls: Container[str]
+) -> Tuple[int, Set[FlatAd], int, Optional[int]]:
+    """
+    Fetch and parse a single search results page, returning its status code,
+    the ads not in seen_urls, the number of ads skipped as already seen and
+    the highest page number linked from its pagination.
+    """
+    url = f"{config.WG_GESUCHT_BASE_URL}/{config.CITY_PART}.{page_num}.html?pagination=1&pu="
+    log.debug(f"Scraping URL: {url}")
+
+    response = requests_get(url)
+    if response.status_code != 200:
+        return response.status_code, set(), 0, None
+    parser = ListPageParser(response.text)
+    page_ads = parser.parse(skip_urls=seen_urls)
+    return response.status_code, page_ads, parser.skipped, parser.last_page()
 
 
 def get_flat_details(url: str) -> FlatAdDetails:
     """
     Extract detailed information from a flat ad page, delegating parsing.
+
+    Results of ads that are still online are memoized in-process and persisted
+    to DETAILS_CACHE_FILE, so that calls and runs within DETAILS_CACHE_TTL of
+    the fetch skip the request entirely.
     """
+    cached = _get_cached_details(url)
+    if cached is not None:
+        log.debug(f"Using cached details for {url}")
+        return cached
+
     log.debug(f"Fetching details for {url}")
     response = requests_get(url)
     response.raise_for_status()
     
     parser = DetailPageParser(response.text)
-    return parser.parse()
+    details = parser.parse()
+    # Empty details may come from a bot wall as well as an offline ad, never cache them
+    if details != FlatAdDetails():
+        _cache_details(url, details)
+    return details
+
+
+def _open_details_cache_locked() -> Optional[shelve.Shelf]:
+    """Opens the on-disk cache on first use and keeps the handle for the process."""
+    global _details_cache, _details_cache_opened
+    if not _details_cache_opened:
+        _details_cache_opened = True
+        if DETAILS_CACHE_FILE is None:
+            return None
+        try:
+            os.makedirs(os.path.dirname(DETAILS_CACHE_FILE) or ".", exist_ok=True)
+            _details_cache = shelve.open(DETAILS_CACHE_FILE)
+            atexit.register(_details_cache.close)
+        except Exception as e:
+            log.warning(f"Details cache unavailable, fetching without it: {e}")
+    return _details_cache
+
+
+def _remember_details_locked(url: str, fetched_at: float, details: FlatAdDetails) -> None:
+    _details_memo[url] = (fetched_at, details)
+    _details_memo.move_to_end(url)
+    if len(_details_memo) > DETAILS_MEMO_SIZE:
+        _details_memo.popitem(last=False)
+
+
+def _get_cached_details(url: str) -> Optional[FlatAdDetails]:
+    expired_before = time.time() - DETAILS_CACHE_TTL
+    with _details_cache_lock:
+        entry = _details_memo.get(url)
+        if entry is not None and entry[0] >= expired_before:
+            _details_memo.move_to_end(url)
+            return entry[1]
+
+        cache = _open_details_cache_locked()
+        try:
+            stored = cache.get(url) if cache is not None else None
+            if stored is None or stored["fetched_at"] < expired_before:
+                return None
+            details = FlatAdDetails(**stored["details"])
+        except Exception:
+            # Unreadable entry, fetch as usual
+            return None
+        _remember_details_locked(url, stored["fetched_at"], details)
+        return details
+
+
+def _cache_details(url: str, details: FlatAdDetails) -> None:
+    fetched_at = time.time()
+    with _details_cache_lock:
+        _remember_details_locked(url, fetched_at, details)
+        cache = _open_details_cache_locked()
+        if cache is None:
+            return
+        try:
+            # Stored as a plain dict so entries survive changes to the dataclass layout
+            cache[url] = {"fetched_at": fetched_at, "details": asdict(details)}
+        except Exception as e:
+            log.warning(f"Failed to cache details for {url}: {e}")
+
+
+def get_flat_details_many(
+    urls: Iterable[str], max_workers: int = 64
+) -> Iterator[Tuple[str, FlatAdDetails]]:
+    """
+    Fetch details for many ads concurrently, yielding (url, details) pairs in input order.
+    """
+    urls = list(urls)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from zip(urls, executor.map(get_flat_details, urls))
@@ -1,7 +1,9 @@
-import random, time, threading
-from collections import defaultdict
+import itertools, random, time, threading
+from collections.abc import Iterator
+from collections import Counter
 import requests
 from requests.adapters import HTTPAdapter
+from requests.utils import prepend_scheme_if_needed
 from urllib3.util.retry import Retry
 from requests.exceptions import ProxyError, ConnectTimeout, ReadTimeout, SSLError, ConnectionError, RequestException
 
@@ -16,11 +18,14 @@ MAX_ATTEMPTS = 200
 CONNECT_TIMEOUT = 3
 READ_TIMEOUT = 5
 MAX_JITTER = 0.15
+PROXY_SKIP_PROB = 0.05
 
 # --- State ---
 proxy_list: list[str] = []
-proxy_failure_counts: defaultdict[str, int] = defaultdict(int)
-_proxy_lock = threading.RLock()
+proxy_failure_counts: Counter[str] = Counter()  # missing proxies read as 0 without being inserted
+_proxy_lock = threading.Lock()
+_proxy_cycle: Iterator[str] = iter(())
+_proxy_cycle_len = 0
 
 # --- Session ---
 _session = requests.Session()
@@ -47,6 +52,10 @@ def _get_proxies(path: str = PROXY_FILE) -> list[str]:
 def _remove_failed_proxy_locked(p: str) -> None:
     if p in proxy_list: proxy_list.remove(p)
     proxy_failure_counts.pop(p, None)
+    # The adapter keeps one connection pool per proxy URL, close the removed proxy's connections
+    manager = _adapter.proxy_manager.get(prepend_scheme_if_needed(p, "http"))
+    if manager is not None: manager.clear()
+    _rebuild_proxy_cycle_locked()
 
 def _handle_proxy_failure(p: str | None) -> None:
     if not p: return
@@ -56,19 +65,34 @@ def _handle_proxy_failure(p: str | None) -> None:
         if c >= PROXY_REMOVE_AFTER: _remove_failed_proxy_locked(p)
 
 def _handle_proxy_success(p: str | None) -> None:
-    if not p: return
-    with _proxy_lock: proxy_failure_counts[p] = 0
+    # Healthy proxies have no entry, so the common case never takes the lock
+    if not p or not proxy_failure_counts[p]: return
+    with _proxy_lock: proxy_failure_counts.pop(p, None)
 
 def _ensure_global_proxies() -> None:
     if proxy_list: return
     new_list = _get_proxies()
     with _proxy_lock:
-        if not proxy_list and new_list: proxy_list[:] = new_list
+        if not proxy_list and new_list:
+            proxy_list[:] = new_list
+            _rebuild_proxy_cycle_locked()
 
-def _snapshot_local() -> list[str]:
-    with _proxy_lock:
-        local = [p for p in proxy_list if proxy_failure_counts[p] < SOFT_EXCLUDE_AFTER]
-        return local or proxy_list[:]
+# Shuffled once per proxy list change, each attempt then only advances the cycle
+def _rebuild_proxy_cycle_locked() -> None:
+    global _proxy_cycle, _proxy_cycle_len
+    order = proxy_list[:]; random.shuffle(order)
+    _proxy_cycle, _proxy_cycle_len = itertools.cycle(order), len(order)
+
+def _next_proxy() -> str:
+    cycle, n = _proxy_cycle, _proxy_cycle_len
+    if not n: raise RequestException("No proxies available")
+    p = next(cycle)
+    # Pass over soft-excluded proxies and, for load spreading, the odd healthy one.
+    # After a full round without a pick the current proxy is used anyway.
+    for _ in range(n - 1):
+        if proxy_failure_counts[p] < SOFT_EXCLUDE_AFTER and random.random() >= PROXY_SKIP_PROB: break
+        p = next(cycle)
+    return p
 
 def _is_retryable_status(code: int) -> bool:
     return code in (301, 302, 401, 403, 407, 429, 500, 502, 503, 504)
@@ -90,16 +114,10 @@ def requests_get(
     max_attempts: int = MAX_ATTEMPTS,
     on_attempt=None,
 ) -> requests.Response:
-    _ensure_global_proxies()
-    local = _snapshot_local(); random.shuffle(local)
-    attempt, i = 0, 0
+    attempt = 0
     while attempt < max_attempts:
-        if i >= len(local):
-            _ensure_global_proxies()
-            local = _snapshot_local()
-            if not local: raise RequestException("No proxies available")
-            random.shuffle(local); i = 0
-        proxy = local[i]; i += 1; attempt += 1
+        _ensure_global_proxies()
+        proxy = _next_proxy(); attempt += 1
         if on_attempt: on_attempt(attempt, proxy)
         proxies = {"http": proxy, "https": proxy}
         headers = {"User-Agent": random.choice(USER_AGENTS)}